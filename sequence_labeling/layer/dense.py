@@ -41,12 +41,11 @@ class Dense(object):
         with tf.variable_scope(self.scope, reuse=tf.AUTO_REUSE), tf.device(self.device_spec):
             weight_initializer = create_variable_initializer("glorot_uniform", self.random_seed)
             bias_initializer = create_variable_initializer("zero")
-            self.dense_layer = tf.layers.Dense(units=self.unit_dim, activation=None, use_bias=self.use_bias,
+            self.dense_activation = create_activation_function(self.activation)
+            self.dense_layer = tf.layers.Dense(units=self.unit_dim, activation=self.dense_activation, use_bias=self.use_bias,
                 kernel_initializer=weight_initializer, bias_initializer=bias_initializer,
                 kernel_regularizer=self.regularizer, bias_regularizer=self.regularizer, trainable=self.trainable)
             
-            self.dense_activation = create_activation_function(self.activation)
-            
             self.dropout_layer = Dropout(rate=self.dropout, num_gpus=num_gpus,
                 default_gpu_id=default_gpu_id, random_seed=self.random_seed)
             
@@ -67,9 +66,6 @@ class Dense(object):
             
             input_dense = self.dense_layer(input_dense)
             
-            if self.dense_activation != None:
-                input_dense = self.dense_activation(input_dense)
-            
             input_dense, input_dense_mask = self.dropout_layer(input_dense, input_dense_mask)
             
             if self.residual_connect == True:
@@ -117,15 +113,14 @@ class DoubleDense(object):
         with tf.variable_scope(self.scope, reuse=tf.AUTO_REUSE), tf.device(self.device_spec):
             weight_initializer = create_variable_initializer("glorot_uniform", self.random_seed)
             bias_initializer = create_variable_initializer("zero")
-            self.inner_dense_layer = tf.layers.Dense(units=self.unit_dim * self.inner_scale, activation=None, use_bias=self.use_bias,
-                kernel_initializer=weight_initializer, bias_initializer=bias_initializer,
+            self.dense_activation = create_activation_function(self.activation)
+            self.inner_dense_layer = tf.layers.Dense(units=self.unit_dim * self.inner_scale, activation=self.dense_activation,
+                use_bias=self.use_bias, kernel_initializer=weight_initializer, bias_initializer=bias_initializer,
                 kernel_regularizer=self.regularizer, bias_regularizer=self.regularizer, trainable=self.trainable)
             self.outer_dense_layer = tf.layers.Dense(units=self.unit_dim, activation=None, use_bias=self.use_bias,
                 kernel_initializer=weight_initializer, bias_initializer=bias_initializer,
                 kernel_regularizer=self.regularizer, bias_regularizer=self.regularizer, trainable=self.trainable)
             
-            self.dense_activation = create_activation_function(self.activation)
-            
             self.dropout_layer = Dropout(rate=self.dropout, num_gpus=num_gpus,
                 default_gpu_id=default_gpu_id, random_seed=self.random_seed)
             
@@ -145,10 +140,6 @@ class DoubleDense(object):
                 input_dense, input_dense_mask = self.norm_layer(input_dense, input_dense_mask)
             
             input_dense = self.inner_dense_layer(input_dense)
-            
-            if self.dense_activation != None:
-                input_dense = self.dense_activation(input_dense)
-            
             input_dense = self.outer_dense_layer(input_dense)
             
             input_dense, input_dense_mask = self.dropout_layer(input_dense, input_dense_mask)
@@ -38,6 +38,8 @@ def _create_single_reccurent_cell(unit_dim,
             activation=recurrent_activation, forget_bias=forget_bias)
     elif cell_type == "block_lstm":
         single_cell = tf.contrib.rnn.LSTMBlockCell(num_units=unit_dim, forget_bias=forget_bias)
+    elif cell_type == "cudnn_lstm":
+        single_cell = tf.contrib.cudnn_rnn.CudnnCompatibleLSTMCell(num_units=unit_dim)
     elif cell_type == "block_fused_lstm":
         single_cell = tf.contrib.rnn.LSTMBlockFusedCell(num_units=unit_dim, forget_bias=forget_bias)
     elif cell_type == "gru":
@@ -62,6 +64,19 @@ def _create_single_reccurent_cell(unit_dim,
     
     return single_cell
 
+def _create_cudnn_layer(unit_dim,
+                        cudnn_enable,
+                        random_seed,
+                        scope):
+    """create single-layer cudnn lstm, or cudnn compatible lstm cell with the same canonical weight names"""
+    if cudnn_enable == True:
+        cudnn_layer = tf.contrib.cudnn_rnn.CudnnLSTM(num_layers=1, num_units=unit_dim,
+            direction="unidirectional", seed=random_seed, name=scope)
+    else:
+        cudnn_layer = tf.contrib.rnn.MultiRNNCell([tf.contrib.cudnn_rnn.CudnnCompatibleLSTMCell(num_units=unit_dim)])
+    
+    return cudnn_layer
+
 def _create_recurrent_cell(num_layer,
                            unit_dim,
                            cell_type,
@@ -175,6 +190,7 @@ class BiRNN(object):
                  default_gpu_id=0,
                  random_seed=0,
                  trainable=True,
+                 cudnn_enable=True,
                  scope="bi_rnn"):
         """initialize bi-directional recurrent layer"""
         self.num_layer = num_layer
@@ -191,13 +207,84 @@ class BiRNN(object):
         self.trainable = trainable
         self.scope = scope
         
+        """cudnn kernel only runs on gpu, otherwise cudnn compatible cell is used"""
+        self.cudnn_enable = cudnn_enable == True and self.cell_type == "cudnn_lstm" and self.num_gpus > 0
+        
         with tf.variable_scope(self.scope, reuse=tf.AUTO_REUSE):
-            self.fwd_cell = _create_recurrent_cell(self.num_layer, self.unit_dim, self.cell_type,
-                self.activation, self.dropout, self.forget_bias, self.residual_connect,
-                self.attention_mechanism, self.num_gpus, self.default_gpu_id, self.random_seed)
-            self.bwd_cell = _create_recurrent_cell(self.num_layer, self.unit_dim, self.cell_type,
-                self.activation, self.dropout, self.forget_bias, self.residual_connect,
-                self.attention_mechanism, self.num_gpus, self.default_gpu_id + self.num_layer, self.random_seed)
+            if self.cell_type == "cudnn_lstm":
+                """one single-layer lstm per layer, so that hidden state of each layer is available"""
+                self.fwd_cell = [_create_cudnn_layer(self.unit_dim, self.cudnn_enable, self.random_seed,
+                    "fwd_cudnn_lstm_{0}".format(i)) for i in range(self.num_layer)]
+                self.bwd_cell = [_create_cudnn_layer(self.unit_dim, self.cudnn_enable, self.random_seed,
+                    "bwd_cudnn_lstm_{0}".format(i)) for i in range(self.num_layer)]
+            else:
+                self.fwd_cell = _create_recurrent_cell(self.num_layer, self.unit_dim, self.cell_type,
+                    self.activation, self.dropout, self.forget_bias, self.residual_connect,
+                    self.attention_mechanism, self.num_gpus, self.default_gpu_id, self.random_seed)
+                self.bwd_cell = _create_recurrent_cell(self.num_layer, self.unit_dim, self.cell_type,
+                    self.activation, self.dropout, self.forget_bias, self.residual_connect,
+                    self.attention_mechanism, self.num_gpus, self.default_gpu_id + self.num_layer, self.random_seed)
+    
+    def _call_cudnn_layer(self,
+                          cudnn_layer,
+                          input_data,
+                          input_length,
+                          scope):
+        """call single-layer cudnn lstm on time-major input"""
+        if self.dropout > 0.0:
+            input_data = tf.nn.dropout(input_data, 1.0-self.dropout, seed=self.random_seed)
+        
+        if self.cudnn_enable == True:
+            output_data, _ = cudnn_layer(input_data)
+            variable_list = cudnn_layer.trainable_variables
+            
+            """opaque params are saved through their saveable in canonical layout of cudnn compatible cell"""
+            opaque_name = variable_list[0].op.name
+            [tf.add_to_collection(CUDNN_SAVEABLES, saveable)
+                for saveable in tf.get_collection(tf.GraphKeys.SAVEABLE_OBJECTS) if saveable.name.startswith(opaque_name)]
+        else:
+            with tf.variable_scope(scope) as cudnn_scope:
+                output_data, _ = tf.nn.dynamic_rnn(cudnn_layer, input_data,
+                    sequence_length=input_length, dtype=input_data.dtype, time_major=True)
+            
+            variable_list = tf.get_collection(tf.GraphKeys.GLOBAL_VARIABLES, scope=cudnn_scope.name + "/")
+            [tf.add_to_collection(CUDNN_SAVEABLES, v) for v in variable_list]
+        
+        [tf.add_to_collection(CUDNN_VARIABLES, v) for v in variable_list]
+        
+        """frozen layer is kept out of trainable variables, so optimizer doesn't update it"""
+        if self.trainable == False:
+            trainable_list = tf.get_collection_ref(tf.GraphKeys.TRAINABLE_VARIABLES)
+            [trainable_list.remove(v) for v in variable_list if v in trainable_list]
+        
+        return output_data
+    
+    def _call_cudnn(self,
+                    input_data,
+                    input_length):
+        """call cudnn bi-directional recurrent layer"""
+        fwd_input = tf.transpose(input_data, perm=[1, 0, 2])
+        
+        """cudnn kernel doesn't take sequence length, so backward direction runs on reversed sequence"""
+        bwd_input = tf.reverse_sequence(fwd_input, input_length, seq_axis=0, batch_axis=1)
+        
+        last_index = tf.stack([tf.range(tf.shape(input_data)[0]), tf.maximum(input_length - 1, 0)], axis=-1)
+        state_list = []
+        for i in range(self.num_layer):
+            with tf.device(get_device_spec(self.default_gpu_id + i, self.num_gpus)):
+                fwd_input = self._call_cudnn_layer(self.fwd_cell[i], fwd_input, input_length, "fwd_cudnn_lstm_{0}".format(i))
+            
+            with tf.device(get_device_spec(self.default_gpu_id + self.num_layer + i, self.num_gpus)):
+                bwd_input = self._call_cudnn_layer(self.bwd_cell[i], bwd_input, input_length, "bwd_cudnn_lstm_{0}".format(i))
+            
+            """hidden state of each layer is forward output at sequence end and backward output at sequence start"""
+            state_list.append(tf.gather_nd(tf.transpose(fwd_input, perm=[1, 0, 2]), last_index))
+            state_list.append(tf.gather_nd(tf.transpose(bwd_input, perm=[1, 0, 2]), last_index))
+        
+        fwd_output = tf.transpose(fwd_input, perm=[1, 0, 2])
+        bwd_output = tf.reverse_sequence(tf.transpose(bwd_input, perm=[1, 0, 2]), input_length, seq_axis=1, batch_axis=0)
+        
+        return (fwd_output, bwd_output), state_list
     
     def __call__(self,
                  input_data,
@@ -212,20 +299,23 @@ class BiRNN(object):
                 input_mask = tf.reshape(input_mask, shape=tf.concat([[-1], input_mask_shape[-2:]], axis=0))
             
             input_length = tf.cast(tf.reduce_sum(tf.squeeze(input_mask, axis=-1), axis=-1), dtype=tf.int32)
-            output_recurrent, final_state_recurrent = tf.nn.bidirectional_dynamic_rnn(cell_fw=self.fwd_cell,
-                cell_bw=self.bwd_cell, inputs=input_data, sequence_length=input_length, dtype=input_data.dtype)
+            if self.cell_type == "cudnn_lstm":
+                output_recurrent, state_list = self._call_cudnn(input_data, input_length)
+            else:
+                output_recurrent, final_state_recurrent = tf.nn.bidirectional_dynamic_rnn(cell_fw=self.fwd_cell,
+                    cell_bw=self.bwd_cell, inputs=input_data, sequence_length=input_length, dtype=input_data.dtype)
+                
+                fwd_state = final_state_recurrent[0]
+                bwd_state = final_state_recurrent[1]
+                
+                state_list = []
+                for i in range(self.num_layer):
+                    state_list.append(_extract_hidden_state(fwd_state[i], self.cell_type))
+                    state_list.append(_extract_hidden_state(bwd_state[i], self.cell_type))
             
             output_recurrent = tf.concat(output_recurrent, axis=-1)
             output_mask = input_mask
             
-            fwd_state = final_state_recurrent[0]
-            bwd_state = final_state_recurrent[1]
-            
-            state_list = []
-            for i in range(self.num_layer):
-                state_list.append(_extract_hidden_state(fwd_state[i], self.cell_type))
-                state_list.append(_extract_hidden_state(bwd_state[i], self.cell_type))
-
             final_state_recurrent = tf.concat(state_list, axis=-1)
             final_state_mask = tf.squeeze(tf.reduce_max(input_mask, axis=1, keepdims=True), axis=1)
             
@@ -41,7 +41,7 @@ class AttentionCRF(BaseModel):
             label_inverted_index = self.data_pipeline.label_inverted_index
             self.word_vocab_size = self.data_pipeline.word_vocab_size
             self.char_vocab_size = self.data_pipeline.char_vocab_size
-            self.sequence_length = tf.cast(tf.reduce_sum(text_word_mask, axis=[-1, -2]), dtype=tf.int32)
+            self.sequence_length = self.data_pipeline.input_sequence_length
             
             """build graph for attention crf model"""
             self.logger.log_print("# build graph")
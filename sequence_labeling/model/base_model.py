@@ -40,6 +40,8 @@ class BaseModel(object):
         self.train_summary = None
         
         self.word_embedding = external_data["word_embedding"] if external_data is not None and "word_embedding" in external_data else None
+        self.word_vocab_char = external_data["word_vocab_char"] if external_data is not None and "word_vocab_char" in external_data else None
+        self.word_vocab_char_mask = external_data["word_vocab_char_mask"] if external_data is not None and "word_vocab_char_mask" in external_data else None
         
         self.batch_size = tf.size(tf.reduce_max(self.data_pipeline.input_text_word_mask, axis=[-1,-2]))
         
@@ -1,17 +1,19 @@
 import collections
-import functools
+import contextlib
 import os.path
-import operator
 import time
 
 import numpy as np
 import tensorflow as tf
 
-from functools import reduce
+from tensorflow.contrib.compiler import jit
+from tensorflow.python.tools import optimize_for_inference_lib
+from tensorflow.tools.graph_transforms import TransformGraph
 
 from util.default_util import *
 from util.sequence_labeling_util import *
 from util.layer_util import *
+from util.crf_util import *
 
 from model.base_model import *
 
@@ -41,26 +43,41 @@ class SequenceCRF(BaseModel):
             label_inverted_index = self.data_pipeline.label_inverted_index
             self.word_vocab_size = self.data_pipeline.word_vocab_size
             self.char_vocab_size = self.data_pipeline.char_vocab_size
-            self.sequence_length = tf.cast(tf.reduce_sum(text_word_mask, axis=[-1, -2]), dtype=tf.int32)
+            self.sequence_length = self.data_pipeline.input_sequence_length
+            
+            """cudnn lstm keeps its weights in one opaque buffer, which has no per-weight ema in canonical layout"""
+            if self.hyperparams.model_sequence_cell_type == "cudnn_lstm" and self.hyperparams.train_ema_enable == True:
+                raise ValueError("unsupported cell type {0} with ema enabled".format(self.hyperparams.model_sequence_cell_type))
             
             """build graph for sequence crf model"""
             self.logger.log_print("# build graph")
-            predict, predict_mask, transition_matrix = self._build_graph(text_word,
+            self.cache_op_list = []
+            """crf decode and loss only read positions within sequence length, so predict needs no masking"""
+            predict, _, transition_matrix = self._build_graph(text_word,
                 text_word_mask, text_char, text_char_mask, text_ext, text_ext_mask)
-            masked_predict = predict * predict_mask
-            self.index_predict, _ = tf.contrib.crf.crf_decode(masked_predict, transition_matrix, self.sequence_length)
+            self.transition_matrix = transition_matrix
+            self.index_predict = self._decode_predict(predict, transition_matrix, self.sequence_length)
             self.text_predict = label_inverted_index.lookup(tf.cast(self.index_predict, dtype=tf.int64))
             
-            self.variable_list = tf.get_collection(tf.GraphKeys.GLOBAL_VARIABLES)
-            self.variable_lookup = {v.op.name: v for v in self.variable_list}
-            
-            self.transferable_list = tf.get_collection(TRANSFERABLE_VARIABLES)
-            self.transferable_lookup = {v.op.name: v for v in self.transferable_list}
+            """cache tables are computed from restored variables, so they are kept out of checkpoints"""
+            cache_list = tf.get_collection(CACHE_VARIABLES)
+            """cudnn lstm params are saved under canonical names of cudnn compatible cell"""
+            cudnn_list = tf.get_collection(CUDNN_VARIABLES)
+            self.variable_list = tuple(v for v in tf.get_collection(tf.GraphKeys.GLOBAL_VARIABLES)
+                if v not in cache_list and v not in cudnn_list)
+            self.transferable_list = tuple(v for v in tf.get_collection(TRANSFERABLE_VARIABLES)
+                if v not in cache_list and v not in cudnn_list)
+            self.cudnn_lookup = {s.name.split(":")[0]: s for s in tf.get_collection(CUDNN_SAVEABLES)}
+            cudnn_transferable = any(v in cudnn_list for v in tf.get_collection(TRANSFERABLE_VARIABLES))
             
             if self.hyperparams.train_ema_enable == True:
                 self.ema = self._get_exponential_moving_average(self.global_step)
-                self.variable_lookup = {self.ema.average_name(v): v for v in self.variable_list}
-                self.transferable_lookup = {self.ema.average_name(v): v for v in self.transferable_list}
+                get_variable_name = self.ema.average_name
+            else:
+                get_variable_name = lambda v: v.op.name
+            
+            self.variable_lookup = dict(zip(map(get_variable_name, self.variable_list), self.variable_list))
+            self.transferable_lookup = dict(zip(map(get_variable_name, self.transferable_list), self.transferable_list))
             
             if self.mode == "train":
                 self.global_step = tf.get_variable("global_step", shape=[], dtype=tf.int32,
@@ -72,7 +89,7 @@ class SequenceCRF(BaseModel):
                 
                 """compute optimization loss"""
                 self.logger.log_print("# setup loss computation mechanism")
-                self.train_loss = self._compute_loss(masked_label, masked_predict, self.sequence_length, transition_matrix)
+                self.train_loss = self._compute_loss(masked_label, predict, self.sequence_length, transition_matrix)
                 
                 if self.hyperparams.train_regularization_enable == True:
                     regularization_variables = tf.get_collection(tf.GraphKeys.REGULARIZATION_LOSSES)
@@ -131,6 +148,8 @@ class SequenceCRF(BaseModel):
             self.ckpt_debug_dir = os.path.join(self.hyperparams.train_ckpt_output_dir, "debug")
             self.ckpt_epoch_dir = os.path.join(self.hyperparams.train_ckpt_output_dir, "epoch")
             self.ckpt_transfer_dir = os.path.join(self.hyperparams.train_ckpt_output_dir, "transfer")
+            self.ckpt_frozen_dir = os.path.join(self.hyperparams.train_ckpt_output_dir, FROZEN_DIR)
+            self.ckpt_infer_dir = os.path.join(self.hyperparams.train_ckpt_output_dir, "infer")
             
             if not tf.gfile.Exists(self.ckpt_debug_dir):
                 tf.gfile.MakeDirs(self.ckpt_debug_dir)
@@ -141,13 +160,34 @@ class SequenceCRF(BaseModel):
             if not tf.gfile.Exists(self.ckpt_transfer_dir):
                 tf.gfile.MakeDirs(self.ckpt_transfer_dir)
             
+            if not tf.gfile.Exists(self.ckpt_frozen_dir):
+                tf.gfile.MakeDirs(self.ckpt_frozen_dir)
+            
+            if not tf.gfile.Exists(self.ckpt_infer_dir) and self.mode != "train":
+                tf.gfile.MakeDirs(self.ckpt_infer_dir)
+            
             self.ckpt_debug_name = os.path.join(self.ckpt_debug_dir, "model_debug_ckpt")
             self.ckpt_epoch_name = os.path.join(self.ckpt_epoch_dir, "model_epoch_ckpt")
+            self.ckpt_infer_name = os.path.join(self.ckpt_infer_dir, "model_infer_ckpt")
+            self.ckpt_frozen_name = FROZEN_MODEL_NAME
+            self.ckpt_quantized_name = QUANTIZED_MODEL_NAME
+            self.ckpt_aot_config_name = AOT_CONFIG_NAME
+            
+            self.variable_lookup.update(self.cudnn_lookup)
+            if cudnn_transferable == True:
+                self.transferable_lookup.update(self.cudnn_lookup)
             
             self.ckpt_debug_saver = tf.train.Saver(self.variable_lookup)
             self.ckpt_epoch_saver = tf.train.Saver(self.variable_lookup, max_to_keep=self.hyperparams.train_num_epoch)
             self.ckpt_transfer_saver = (tf.train.Saver(self.transferable_lookup)
                 if any(self.transferable_lookup) else tf.train.Saver(self.variable_lookup))
+            
+            self.ckpt_step = None
+            if self.mode != "train":
+                """infer checkpoint stores restored (possibly ema) values under primary variable names"""
+                infer_lookup = {v.op.name: v for v in self.variable_list}
+                infer_lookup.update(self.cudnn_lookup)
+                self.ckpt_infer_saver = tf.train.Saver(infer_lookup, max_to_keep=1)
     
     def _build_representation_layer(self,
                                     text_word,
@@ -170,6 +210,8 @@ class SequenceCRF(BaseModel):
         char_pooling_type = self.hyperparams.model_char_pooling_type
         char_feat_trainable = self.hyperparams.model_char_feat_trainable
         char_feat_enable = self.hyperparams.model_char_feat_enable
+        char_feat_cache_enable = (self.hyperparams.model_char_feat_cache_enable and
+            word_feat_enable and self.mode != "train" and self.word_vocab_char is not None)
         ext_embed_dim = self.hyperparams.model_ext_embed_dim
         ext_feat_enable = self.hyperparams.model_ext_feat_enable
         ext_feat_mode = self.hyperparams.model_ext_feat_mode
@@ -179,11 +221,12 @@ class SequenceCRF(BaseModel):
         fusion_hidden_activation = self.hyperparams.model_fusion_hidden_activation
         fusion_dropout = self.hyperparams.model_fusion_dropout if self.mode == "train" else 0.0
         fusion_trainable = self.hyperparams.model_fusion_trainable
+        fusion_cache_enable = (self.hyperparams.model_fusion_cache_enable and word_feat_enable and self.mode != "train" and
+            (char_feat_enable == False or self.word_vocab_char is not None) and not (ext_feat_enable and ext_feat_mode == "fusion"))
+        char_feat_cache_enable = char_feat_cache_enable and not fusion_cache_enable
+        cache_chunk_size = self.hyperparams.model_cache_chunk_size
         
         with tf.variable_scope("representation", reuse=tf.AUTO_REUSE):
-            text_feat_list = []
-            text_feat_mask_list = []
-            
             if word_feat_enable == True:
                 self.logger.log_print("# build word-level representation layer")
                 word_feat_layer = WordFeat(vocab_size=self.word_vocab_size, embed_dim=word_embed_dim,
@@ -191,35 +234,22 @@ class SequenceCRF(BaseModel):
                     num_gpus=self.num_gpus, default_gpu_id=self.default_gpu_id, regularizer=self.regularizer,
                     random_seed=self.random_seed, trainable=word_feat_trainable)
                 
-                (text_word_feat,
-                    text_word_feat_mask) = word_feat_layer(text_word, text_word_mask)
-                text_feat_list.append(text_word_feat)
-                text_feat_mask_list.append(text_word_feat_mask)
-                
                 word_unit_dim = word_embed_dim
             else:
                 word_unit_dim = 0
             
             if char_feat_enable == True:
                 self.logger.log_print("# build char-level representation layer")
+                char_cache_size = self.word_vocab_size if char_feat_cache_enable == True else 0
                 char_feat_layer = CharFeat(vocab_size=self.char_vocab_size, embed_dim=char_embed_dim, unit_dim=char_unit_dim,
                     window_size=char_window_size, activation=char_hidden_activation, pooling_type=char_pooling_type,
-                    dropout=char_dropout, num_gpus=self.num_gpus, default_gpu_id=self.default_gpu_id,
+                    dropout=char_dropout, cache_size=char_cache_size, num_gpus=self.num_gpus, default_gpu_id=self.default_gpu_id,
                     regularizer=self.regularizer, random_seed=self.random_seed, trainable=char_feat_trainable)
-                
-                (text_char_feat,
-                    text_char_feat_mask) = char_feat_layer(text_char, text_char_mask)
-                
-                text_feat_list.append(text_char_feat)
-                text_feat_mask_list.append(text_char_feat_mask)
             else:
                 char_unit_dim = 0
             
             if ext_feat_enable == True and ext_feat_mode == "fusion":
                 self.logger.log_print("# build extended representation layer")
-                text_feat_list.append(text_ext)
-                text_feat_mask_list.append(text_ext_mask)
-                
                 ext_unit_dim = ext_embed_dim
             else:
                 ext_unit_dim = 0
@@ -230,7 +260,80 @@ class SequenceCRF(BaseModel):
                 dropout=fusion_dropout, num_gpus=self.num_gpus, default_gpu_id=self.default_gpu_id,
                 regularizer=self.regularizer, random_seed=self.random_seed, trainable=fusion_trainable)
             
-            text_feat, text_feat_mask = feat_fusion_layer(text_feat_list, text_feat_mask_list)
+            def featurize(word, word_mask, char, char_mask, ext, ext_mask):
+                """featurize word-level, char-level and extended input, then fuse them"""
+                feat_list = []
+                feat_mask_list = []
+                
+                if word_feat_enable == True:
+                    word_feat, word_feat_mask = word_feat_layer(word, word_mask)
+                    feat_list.append(word_feat)
+                    feat_mask_list.append(word_feat_mask)
+                
+                if char_feat_enable == True:
+                    if char_feat_cache_enable == True:
+                        char_feat, char_feat_mask = char_feat_layer(char, char_mask, word)
+                    else:
+                        char_feat, char_feat_mask = char_feat_layer(char, char_mask)
+                    
+                    feat_list.append(char_feat)
+                    feat_mask_list.append(char_feat_mask)
+                
+                if ext_feat_enable == True and ext_feat_mode == "fusion":
+                    feat_list.append(ext)
+                    feat_mask_list.append(ext_mask)
+                
+                return feat_fusion_layer(feat_list, feat_mask_list)
+            
+            if fusion_cache_enable == True:
+                self.logger.log_print("# build fused representation cache")
+                fusion_cache_table = tf.get_variable("fusion_cache_table", shape=[self.word_vocab_size, fusion_unit_dim],
+                    initializer=tf.zeros_initializer, trainable=False,
+                    collections=[tf.GraphKeys.GLOBAL_VARIABLES, CACHE_VARIABLES], dtype=tf.float32)
+                
+                input_word = tf.squeeze(text_word, axis=-1)
+                text_feat = tf.nn.embedding_lookup(fusion_cache_table, input_word)
+                text_feat_mask = text_word_mask
+                
+                """fall back to live featurization for unknown words, which share the same word id 0"""
+                oov_index = tf.where(tf.equal(input_word, 0))
+                oov_word = tf.expand_dims(tf.gather_nd(text_word, oov_index), axis=0)
+                oov_word_mask = tf.expand_dims(tf.gather_nd(text_word_mask, oov_index), axis=0)
+                oov_char = tf.expand_dims(tf.gather_nd(text_char, oov_index), axis=0) if char_feat_enable == True else None
+                oov_char_mask = tf.expand_dims(tf.gather_nd(text_char_mask, oov_index), axis=0) if char_feat_enable == True else None
+                oov_feat, _ = featurize(oov_word, oov_word_mask, oov_char, oov_char_mask, None, None)
+                oov_feat = tf.scatter_nd(oov_index, tf.squeeze(oov_feat, axis=0), tf.shape(text_feat, out_type=tf.int64))
+                oov_mask = tf.cast(tf.expand_dims(tf.equal(input_word, 0), axis=-1), dtype=tf.float32)
+                
+                text_feat = text_feat * (1.0 - oov_mask) + oov_feat
+                
+                def fill_fusion_cache(chunk_start):
+                    """fusion module is position-wise, so fused feature of each word in vocab can be computed once"""
+                    chunk_end = tf.minimum(chunk_start + cache_chunk_size, self.word_vocab_size)
+                    vocab_word = tf.reshape(tf.range(chunk_start, chunk_end, dtype=tf.int32), shape=[1, -1, 1])
+                    vocab_word_mask = tf.ones_like(vocab_word, dtype=tf.float32)
+                    vocab_char = (tf.expand_dims(self.word_vocab_char[chunk_start:chunk_end], axis=0)
+                        if char_feat_enable == True else None)
+                    vocab_char_mask = (tf.expand_dims(self.word_vocab_char_mask[chunk_start:chunk_end], axis=0)
+                        if char_feat_enable == True else None)
+                    vocab_feat, _ = featurize(vocab_word, vocab_word_mask, vocab_char, vocab_char_mask, None, None)
+                    fill_op = tf.scatter_update(fusion_cache_table,
+                        tf.range(chunk_start, chunk_end, dtype=tf.int32), tf.squeeze(vocab_feat, axis=0))
+                    
+                    with tf.control_dependencies([fill_op]):
+                        return chunk_start + cache_chunk_size
+                
+                """cache table is filled in fixed-size chunks of vocab, which bounds peak memory of featurization"""
+                self.cache_op_list.append(tf.while_loop(lambda chunk_start: chunk_start < self.word_vocab_size,
+                    fill_fusion_cache, [tf.constant(0, dtype=tf.int32)], back_prop=False))
+            else:
+                text_feat, text_feat_mask = featurize(text_word, text_word_mask,
+                    text_char, text_char_mask, text_ext, text_ext_mask)
+                
+                if char_feat_cache_enable == True:
+                    self.logger.log_print("# build char-level representation cache")
+                    self.cache_op_list.append(char_feat_layer.build_cache(self.word_vocab_char,
+                        self.word_vocab_char_mask, cache_chunk_size))
         
         return text_feat, text_feat_mask
     
@@ -251,6 +354,7 @@ class SequenceCRF(BaseModel):
         sequence_forget_bias = self.hyperparams.model_sequence_forget_bias
         sequence_residual_connect = self.hyperparams.model_sequence_residual_connect
         sequence_trainable = self.hyperparams.model_sequence_trainable
+        sequence_cudnn_enable = self.mode != "online"
         labeling_unit_dim = self.hyperparams.model_labeling_unit_dim
         labeling_dropout = self.hyperparams.model_labeling_dropout
         labeling_trainable = self.hyperparams.model_labeling_trainable
@@ -258,9 +362,11 @@ class SequenceCRF(BaseModel):
         
         with tf.variable_scope("modeling", reuse=tf.AUTO_REUSE):
             self.logger.log_print("# build sequence modeling layer")
+            """online model is exported for serving on cpu, so it always uses cudnn compatible cell"""
             sequence_modeling_layer = create_recurrent_layer("bi", sequence_num_layer, sequence_unit_dim,
                 sequence_cell_type, sequence_hidden_activation, sequence_dropout, sequence_forget_bias,
-                sequence_residual_connect, None, self.num_gpus, self.default_gpu_id, self.random_seed, sequence_trainable)
+                sequence_residual_connect, None, self.num_gpus, self.default_gpu_id, self.random_seed,
+                sequence_trainable, sequence_cudnn_enable)
             
             (text_sequence_modeling, text_sequence_modeling_mask,
                 _, _) = sequence_modeling_layer(text_feat, text_feat_mask)
@@ -300,7 +406,7 @@ class SequenceCRF(BaseModel):
                      text_ext,
                      text_ext_mask):
         """build graph for sequence crf model"""
-        with tf.variable_scope("graph", reuse=tf.AUTO_REUSE):
+        with tf.variable_scope("graph", reuse=tf.AUTO_REUSE), self._get_jit_scope(True):
             """build representation layer for sequence crf model"""
             text_feat, text_feat_mask = self._build_representation_layer(text_word,
                 text_word_mask, text_char, text_char_mask, text_ext, text_ext_mask)
@@ -315,17 +421,49 @@ class SequenceCRF(BaseModel):
         
         return predict, predict_mask, transition_matrix
     
+    def _decode_predict(self,
+                        predict,
+                        transition_matrix,
+                        sequence_length):
+        """decode predict with transition matrix"""
+        decode_type = self.hyperparams.model_labeling_decode_type
+        if decode_type in ["numba", "numba_cuda"] and self.mode == "online":
+            self.logger.log_print("# {0} decode can't be exported, fall back to default decode".format(decode_type))
+            decode_type = "default"
+        
+        if decode_type == "default":
+            index_predict, _ = tf.contrib.crf.crf_decode(predict, transition_matrix, sequence_length)
+        elif decode_type == "numba":
+            index_predict = create_viterbi_decode(predict, transition_matrix, sequence_length, False)
+        elif decode_type == "numba_cuda":
+            index_predict = create_viterbi_decode(predict, transition_matrix, sequence_length, True)
+        else:
+            raise ValueError("unsupported decode type {0}".format(decode_type))
+        
+        return index_predict
+    
     def _compute_loss(self,
                       label,
                       predict,
                       sequence_length,
                       transition_matrix):
         """compute optimization loss"""
-        log_likelihood, _ = tf.contrib.crf.crf_log_likelihood(predict, label, sequence_length, transition_matrix)
-        loss = tf.reduce_mean(-1.0 * log_likelihood)
+        with self._get_jit_scope(True):
+            log_likelihood = crf_log_likelihood(predict, label, sequence_length, transition_matrix)
+            loss = tf.reduce_mean(-1.0 * log_likelihood)
         
         return loss
     
+    def _get_jit_scope(self,
+                       compile_ops):
+        """get xla jit scope"""
+        if self.hyperparams.device_xla_jit_enable == True:
+            jit_scope = jit.experimental_jit_scope(compile_ops=compile_ops)
+        else:
+            jit_scope = contextlib.ExitStack()
+        
+        return jit_scope
+    
     def build(self,
               sess):
         """build saved model for sequence crf model"""
@@ -369,6 +507,102 @@ class SequenceCRF(BaseModel):
             main_op=tf.tables_initializer())
         
         self.model_builder.save(as_text=False)
+        
+        if self.ckpt_step is not None:
+            """only infer checkpoint of the latest export is kept"""
+            ckpt_state = tf.train.get_checkpoint_state(self.ckpt_infer_dir)
+            if ckpt_state is not None:
+                self.ckpt_infer_saver.recover_last_checkpoints(ckpt_state.all_model_checkpoint_paths)
+            
+            self.save(sess, self.ckpt_step, "infer")
+        
+        if self.hyperparams.train_model_freeze_enable == True:
+            self.freeze(sess)
+    
+    def freeze(self,
+               sess):
+        """freeze graph for sequence crf model"""
+        infer_predict = tf.identity(self.index_predict, name="infer_predict")
+        infer_text_predict = tf.identity(self.text_predict, name="infer_text_predict")
+        infer_sequence_length = tf.identity(self.sequence_length, name="infer_sequence_length")
+        infer_initializer = tf.tables_initializer(name="infer_initializer")
+        
+        output_node_names = [infer_predict.op.name, infer_text_predict.op.name,
+            infer_sequence_length.op.name, infer_initializer.name]
+        frozen_graph_def = tf.graph_util.convert_variables_to_constants(sess,
+            sess.graph.as_graph_def(), output_node_names)
+        frozen_graph_def = tf.graph_util.remove_training_nodes(frozen_graph_def, protected_nodes=output_node_names)
+        
+        if self.hyperparams.data_external_index_enable == True:
+            input_dtype_lookup = {
+                "input_word": tf.int32.as_datatype_enum,
+                "input_char": tf.int32.as_datatype_enum,
+                "input_ext": tf.float32.as_datatype_enum
+            }
+            
+            frozen_node_names = [node.name for node in frozen_graph_def.node]
+            input_node_names = [name for name in ["input_word", "input_char", "input_ext"] if name in frozen_node_names]
+            frozen_graph_def = optimize_for_inference_lib.optimize_for_inference(frozen_graph_def,
+                input_node_names, output_node_names, [input_dtype_lookup[name] for name in input_node_names])
+            
+            self.logger.log_print("# write tfcompile config for frozen graph")
+            self._write_aot_config(input_node_names, infer_predict.op.name)
+        
+        tf.train.write_graph(frozen_graph_def, self.ckpt_frozen_dir, self.ckpt_frozen_name, as_text=False)
+        
+        if self.hyperparams.train_model_quantize_enable == True:
+            """quantize large weights, crf transition matrix is kept in fp32 regardless of its size"""
+            input_node_names = [node.name for node in frozen_graph_def.node if node.op == "Placeholder"]
+            quantized_graph_def = TransformGraph(frozen_graph_def, input_node_names, output_node_names,
+                ["quantize_weights(minimum_size=1024)"])
+            quantized_graph_def = self._restore_frozen_node(quantized_graph_def,
+                frozen_graph_def, self.transition_matrix.op.name)
+            tf.train.write_graph(quantized_graph_def, self.ckpt_frozen_dir, self.ckpt_quantized_name, as_text=False)
+    
+    def _restore_frozen_node(self,
+                             quantized_graph_def,
+                             frozen_graph_def,
+                             node_name):
+        """replace quantized const node with its fp32 const node from frozen graph"""
+        frozen_node_list = [node for node in frozen_graph_def.node if node.name == node_name]
+        if len(frozen_node_list) == 0:
+            raise ValueError("frozen graph has no node {0}".format(node_name))
+        
+        """quantize_weights keeps node name on dequantize node and adds suffixed const nodes for quantized data"""
+        quantized_node_names = [node_name + suffix for suffix in ["_quantized_const", "_quantized_min", "_quantized_max"]]
+        restored_graph_def = tf.GraphDef()
+        restored_graph_def.versions.CopyFrom(quantized_graph_def.versions)
+        restored_graph_def.library.CopyFrom(quantized_graph_def.library)
+        for node in quantized_graph_def.node:
+            if node.name in quantized_node_names:
+                continue
+            elif node.name == node_name:
+                restored_graph_def.node.extend(frozen_node_list)
+            else:
+                restored_graph_def.node.extend([node])
+        
+        return restored_graph_def
+    
+    def _write_aot_config(self,
+                          input_node_names,
+                          output_node_name):
+        """write tfcompile config for frozen graph"""
+        input_shape_lookup = {
+            "input_word": [1, self.hyperparams.data_text_word_size],
+            "input_char": [1, self.hyperparams.data_text_word_size, self.hyperparams.data_text_char_size],
+            "input_ext": [1, self.hyperparams.data_text_word_size, self.hyperparams.model_ext_embed_dim]
+        }
+        
+        aot_config_list = []
+        for input_node_name in input_node_names:
+            input_dim_list = ["dim {{ size: {0} }}".format(dim) for dim in input_shape_lookup[input_node_name]]
+            aot_config_list.append("feed {{\n  id {{ node_name: \"{0}\" }}\n  shape {{ {1} }}\n}}".format(input_node_name, " ".join(input_dim_list)))
+        
+        aot_config_list.append("fetch {{\n  id {{ node_name: \"{0}\" }}\n}}".format(output_node_name))
+        
+        aot_config_file = os.path.join(self.ckpt_frozen_dir, self.ckpt_aot_config_name)
+        with tf.gfile.GFile(aot_config_file, "w") as file:
+            file.write("\n".join(aot_config_list) + "\n")
     
     def save(self,
              sess,
@@ -379,6 +613,8 @@ class SequenceCRF(BaseModel):
             self.ckpt_debug_saver.save(sess, self.ckpt_debug_name, global_step=global_step)
         elif save_mode == "epoch":
             self.ckpt_epoch_saver.save(sess, self.ckpt_epoch_name, global_step=global_step)
+        elif save_mode == "infer":
+            self.ckpt_infer_saver.save(sess, self.ckpt_infer_name, global_step=global_step)
         else:
             raise ValueError("unsupported save mode {0}".format(save_mode))
     
@@ -390,14 +626,22 @@ class SequenceCRF(BaseModel):
         if ckpt_file is None:
             raise FileNotFoundError("checkpoint file doesn't exist")
         
+        """infer checkpoint is only written at export of a model restored from epoch checkpoint"""
+        self.ckpt_step = int(ckpt_file.split("-")[-1]) if ckpt_type == "epoch" and self.mode != "train" else None
+        
         if ckpt_type == "debug":
             self.ckpt_debug_saver.restore(sess, ckpt_file)
         elif ckpt_type == "epoch":
             self.ckpt_epoch_saver.restore(sess, ckpt_file)
         elif ckpt_type == "transfer":
             self.ckpt_transfer_saver.restore(sess, ckpt_file)
+        elif ckpt_type == "infer":
+            self.ckpt_infer_saver.restore(sess, ckpt_file)
         else:
             raise ValueError("unsupported checkpoint type {0}".format(ckpt_type))
+        
+        for cache_op in self.cache_op_list:
+            sess.run(cache_op)
     
     def get_latest_ckpt(self,
                         ckpt_type):
@@ -408,6 +652,8 @@ class SequenceCRF(BaseModel):
             ckpt_file = tf.train.latest_checkpoint(self.ckpt_epoch_dir)
         elif ckpt_type == "transfer":
             ckpt_file = tf.train.latest_checkpoint(self.ckpt_transfer_dir)
+        elif ckpt_type == "infer":
+            ckpt_file = tf.train.latest_checkpoint(self.ckpt_infer_dir)
         else:
             raise ValueError("unsupported checkpoint type {0}".format(ckpt_type))
         
@@ -490,6 +736,7 @@ class CharFeat(object):
                  activation,
                  pooling_type,
                  dropout,
+                 cache_size=0,
                  num_gpus=1,
                  default_gpu_id=0,
                  regularizer=None,
@@ -504,6 +751,7 @@ class CharFeat(object):
         self.activation = activation
         self.pooling_type = pooling_type
         self.dropout = dropout
+        self.cache_size = cache_size
         self.num_gpus = num_gpus
         self.default_gpu_id = default_gpu_id
         self.regularizer = regularizer
@@ -522,25 +770,81 @@ class CharFeat(object):
             self.dropout_layer = create_dropout_layer(self.dropout, self.num_gpus, self.default_gpu_id, self.random_seed)
             
             self.pooling_layer = create_pooling_layer(self.pooling_type, -1, 1, self.num_gpus, self.default_gpu_id)
+            
+            if self.cache_size > 0:
+                """cache table is a global variable, so that filled cache is saved into and loaded from saved model"""
+                self.cache_table = tf.get_variable("cache_table", shape=[self.cache_size, self.unit_dim * len(self.window_size)],
+                    initializer=tf.zeros_initializer, trainable=False,
+                    collections=[tf.GraphKeys.GLOBAL_VARIABLES, CACHE_VARIABLES], dtype=tf.float32)
+    
+    def _featurize(self,
+                   input_char,
+                   input_char_mask):
+        """featurize char-level input with char cnn"""
+        input_char_shape = tf.shape(input_char)
+        input_char_length = input_char_shape[-1]
+        
+        """flatten leading dimensions once, so that char cnn runs as a single conv over all words"""
+        input_char = tf.reshape(input_char, shape=[-1, input_char_length])
+        input_char_embedding_mask = tf.reshape(input_char_mask, shape=[-1, input_char_length, 1])
+        input_char_embedding = self.embedding_layer(input_char)
+        
+        (input_char_dropout,
+            input_char_dropout_mask) = self.dropout_layer(input_char_embedding, input_char_embedding_mask)
+        
+        (input_char_conv,
+            input_char_conv_mask) = self.conv_layer(input_char_dropout, input_char_dropout_mask)
+        
+        (input_char_pool,
+            input_char_pool_mask) = self.pooling_layer(input_char_conv, input_char_conv_mask)
+        
+        input_char_pool = tf.reshape(input_char_pool,
+            shape=tf.concat([input_char_shape[:-1], [self.unit_dim * len(self.window_size)]], axis=0))
+        input_char_pool_mask = tf.reshape(input_char_pool_mask,
+            shape=tf.concat([input_char_shape[:-1], [1]], axis=0))
+        
+        return input_char_pool, input_char_pool_mask
+    
+    def build_cache(self,
+                    vocab_char,
+                    vocab_char_mask,
+                    chunk_size):
+        """build cache table of char-level features for each word in vocab, in fixed-size chunks of vocab"""
+        def fill_cache(chunk_start):
+            chunk_end = tf.minimum(chunk_start + chunk_size, self.cache_size)
+            vocab_char_feat, _ = self._featurize(vocab_char[chunk_start:chunk_end], vocab_char_mask[chunk_start:chunk_end])
+            fill_op = tf.scatter_update(self.cache_table, tf.range(chunk_start, chunk_end, dtype=tf.int32), vocab_char_feat)
+            
+            with tf.control_dependencies([fill_op]):
+                return chunk_start + chunk_size
+        
+        with tf.variable_scope(self.scope, reuse=tf.AUTO_REUSE):
+            cache_op = tf.while_loop(lambda chunk_start: chunk_start < self.cache_size,
+                fill_cache, [tf.constant(0, dtype=tf.int32)], back_prop=False)
+        
+        return cache_op
     
     def __call__(self,
                  input_char,
-                 input_char_mask):
+                 input_char_mask,
+                 input_word=None):
         """call char-level featurization layer"""
         with tf.variable_scope(self.scope, reuse=tf.AUTO_REUSE):
-            input_char_embedding_mask = tf.expand_dims(input_char_mask, axis=-1)
-            input_char_embedding = self.embedding_layer(input_char)
-            
-            (input_char_dropout,
-                input_char_dropout_mask) = self.dropout_layer(input_char_embedding, input_char_embedding_mask)
-            
-            (input_char_conv,
-                input_char_conv_mask) = self.conv_layer(input_char_dropout, input_char_dropout_mask)
-            
-            (input_char_pool,
-                input_char_pool_mask) = self.pooling_layer(input_char_conv, input_char_conv_mask)
-            
-            input_char_feat = input_char_pool
-            input_char_feat_mask = input_char_pool_mask
+            if self.cache_size > 0 and input_word is not None:
+                input_word = tf.squeeze(input_word, axis=-1)
+                input_char_cache = tf.nn.embedding_lookup(self.cache_table, input_word)
+                input_char_cache_mask = tf.reduce_max(input_char_mask, axis=-1, keepdims=True)
+                
+                """fall back to char cnn for unknown words, which share the same word id 0"""
+                input_oov_index = tf.where(tf.equal(input_word, 0))
+                input_oov_feat, _ = self._featurize(tf.gather_nd(input_char, input_oov_index),
+                    tf.gather_nd(input_char_mask, input_oov_index))
+                input_oov_mask = tf.cast(tf.expand_dims(tf.equal(input_word, 0), axis=-1), dtype=tf.float32)
+                input_oov_feat = tf.scatter_nd(input_oov_index, input_oov_feat, tf.shape(input_char_cache, out_type=tf.int64))
+                
+                input_char_feat = input_char_cache * (1.0 - input_oov_mask) + input_oov_feat
+                input_char_feat_mask = input_char_cache_mask
+            else:
+                input_char_feat, input_char_feat_mask = self._featurize(input_char, input_char_mask)
         
         return input_char_feat, input_char_feat_mask
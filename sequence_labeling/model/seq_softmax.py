@@ -41,7 +41,11 @@ class SequenceSoftmax(BaseModel):
             label_inverted_index = self.data_pipeline.label_inverted_index
             self.word_vocab_size = self.data_pipeline.word_vocab_size
             self.char_vocab_size = self.data_pipeline.char_vocab_size
-            self.sequence_length = tf.cast(tf.reduce_sum(text_word_mask, axis=[-1, -2]), dtype=tf.int32)
+            self.sequence_length = self.data_pipeline.input_sequence_length
+            
+            """cudnn lstm keeps its weights in one opaque buffer, which has no per-weight ema in canonical layout"""
+            if self.hyperparams.model_sequence_cell_type == "cudnn_lstm" and self.hyperparams.train_ema_enable == True:
+                raise ValueError("unsupported cell type {0} with ema enabled".format(self.hyperparams.model_sequence_cell_type))
             
             """build graph for sequence softmax model"""
             self.logger.log_print("# build graph")
@@ -50,10 +54,12 @@ class SequenceSoftmax(BaseModel):
             self.index_predict = tf.argmax(softmax_with_mask(predict, predict_mask), axis=-1)
             self.text_predict = label_inverted_index.lookup(self.index_predict)
             
-            self.variable_list = tf.get_collection(tf.GraphKeys.GLOBAL_VARIABLES)
+            """cudnn lstm params are saved under canonical names of cudnn compatible cell"""
+            cudnn_list = tf.get_collection(CUDNN_VARIABLES)
+            self.variable_list = [v for v in tf.get_collection(tf.GraphKeys.GLOBAL_VARIABLES) if v not in cudnn_list]
             self.variable_lookup = {v.op.name: v for v in self.variable_list}
             
-            self.transferable_list = tf.get_collection(TRANSFERABLE_VARIABLES)
+            self.transferable_list = [v for v in tf.get_collection(TRANSFERABLE_VARIABLES) if v not in cudnn_list]
             self.transferable_lookup = {v.op.name: v for v in self.transferable_list}
             
             if self.hyperparams.train_ema_enable == True:
@@ -143,6 +149,11 @@ class SequenceSoftmax(BaseModel):
             self.ckpt_debug_name = os.path.join(self.ckpt_debug_dir, "model_debug_ckpt")
             self.ckpt_epoch_name = os.path.join(self.ckpt_epoch_dir, "model_epoch_ckpt")
             
+            self.cudnn_lookup = {s.name.split(":")[0]: s for s in tf.get_collection(CUDNN_SAVEABLES)}
+            self.variable_lookup.update(self.cudnn_lookup)
+            if any(v in cudnn_list for v in tf.get_collection(TRANSFERABLE_VARIABLES)):
+                self.transferable_lookup.update(self.cudnn_lookup)
+            
             self.ckpt_debug_saver = tf.train.Saver(self.variable_lookup)
             self.ckpt_epoch_saver = tf.train.Saver(self.variable_lookup, max_to_keep=self.hyperparams.train_num_epoch)
             self.ckpt_transfer_saver = (tf.train.Saver(self.transferable_lookup)
@@ -250,6 +261,7 @@ class SequenceSoftmax(BaseModel):
         sequence_forget_bias = self.hyperparams.model_sequence_forget_bias
         sequence_residual_connect = self.hyperparams.model_sequence_residual_connect
         sequence_trainable = self.hyperparams.model_sequence_trainable
+        sequence_cudnn_enable = self.mode != "online"
         labeling_unit_dim = self.hyperparams.model_labeling_unit_dim
         labeling_dropout = self.hyperparams.model_labeling_dropout
         labeling_trainable = self.hyperparams.model_labeling_trainable
@@ -257,9 +269,11 @@ class SequenceSoftmax(BaseModel):
         
         with tf.variable_scope("modeling", reuse=tf.AUTO_REUSE):
             self.logger.log_print("# build sequence modeling layer")
+            """online model is exported for serving on cpu, so it always uses cudnn compatible cell"""
             sequence_modeling_layer = create_recurrent_layer("bi", sequence_num_layer, sequence_unit_dim,
                 sequence_cell_type, sequence_hidden_activation, sequence_dropout, sequence_forget_bias,
-                sequence_residual_connect, None, self.num_gpus, self.default_gpu_id, self.random_seed, sequence_trainable)
+                sequence_residual_connect, None, self.num_gpus, self.default_gpu_id, self.random_seed,
+                sequence_trainable, sequence_cudnn_enable)
             
             (text_sequence_modeling, text_sequence_modeling_mask,
                 _, _) = sequence_modeling_layer(text_feat, text_feat_mask)
@@ -9,6 +9,7 @@ from tensorflow.python import debug as tf_debug
 
 from util.default_util import *
 from util.param_util import *
+from util.data_util import *
 from util.model_util import *
 from util.eval_util import *
 from util.debug_logger import *
@@ -58,7 +59,6 @@ def extrinsic_eval(logger,
     load_model(sess, model, ckpt_file, eval_mode)
     data_dict = pipeline_initialize(sess, model, pipeline_mode, batch_size)
     
-    data_size = data_dict["data_size"]
     input_data = data_dict["input_data"]
     predict_data = []
     while True:
@@ -68,6 +68,18 @@ def extrinsic_eval(logger,
         except  tf.errors.OutOfRangeError:
             break
     
+    extrinsic_eval_predict(logger, summary_writer, input_data, predict_data,
+        metric_list, invalid_labels, global_step, epoch)
+
+def extrinsic_eval_predict(logger,
+                           summary_writer,
+                           input_data,
+                           predict_data,
+                           metric_list,
+                           invalid_labels,
+                           global_step,
+                           epoch):
+    data_size = len(input_data)
     sample_output = []
     predict_output = []
     label_output = []
@@ -109,7 +121,7 @@ def train(logger,
           enable_debug=False):
     config_proto = get_config_proto(hyperparams.device_log_device_placement,
         hyperparams.device_allow_soft_placement, hyperparams.device_allow_growth,
-        hyperparams.device_per_process_gpu_memory_fraction)
+        hyperparams.device_per_process_gpu_memory_fraction, hyperparams.device_xla_jit_enable)
     
     summary_output_dir = hyperparams.train_summary_output_dir
     if not tf.gfile.Exists(summary_output_dir):
@@ -190,7 +202,7 @@ def evaluate(logger,
              enable_debug=False):   
     config_proto = get_config_proto(hyperparams.device_log_device_placement,
         hyperparams.device_allow_soft_placement, hyperparams.device_allow_growth,
-        hyperparams.device_per_process_gpu_memory_fraction)
+        hyperparams.device_per_process_gpu_memory_fraction, hyperparams.device_xla_jit_enable)
     
     summary_output_dir = hyperparams.train_summary_output_dir
     if not tf.gfile.Exists(summary_output_dir):
@@ -218,12 +230,50 @@ def evaluate(logger,
     eval_summary_writer.close_writer()
     logger.log_print("##### finish evaluation #####")
 
+def evaluate_frozen(logger,
+                    hyperparams):
+    config_proto = get_config_proto(hyperparams.device_log_device_placement,
+        hyperparams.device_allow_soft_placement, hyperparams.device_allow_growth,
+        hyperparams.device_per_process_gpu_memory_fraction, hyperparams.device_xla_jit_enable)
+    
+    summary_output_dir = hyperparams.train_summary_output_dir
+    if not tf.gfile.Exists(summary_output_dir):
+        tf.gfile.MakeDirs(summary_output_dir)
+    
+    logger.log_print("##### create frozen model #####")
+    frozen_model = create_frozen_model(logger, hyperparams)
+    if frozen_model.input_text is None:
+        raise ValueError("frozen evaluation requires frozen model exported with external index disabled")
+    
+    frozen_sess = tf.Session(config=config_proto, graph=frozen_model.graph)
+    frozen_sess.run(frozen_model.initializer)
+    
+    eval_summary_writer = SummaryWriter(frozen_model.graph, os.path.join(summary_output_dir, "eval_frozen"))
+    eval_logger = EvalLogger(hyperparams.data_log_output_dir)
+    
+    logger.log_print("##### start frozen evaluation #####")
+    input_data = load_sequence_data(hyperparams.data_eval_sequence_file, hyperparams.data_eval_sequence_file_type)
+    input_text = [sequence_data["text"] for sequence_data in input_data]
+    batch_size = hyperparams.train_eval_batch_size
+    predict_data = []
+    for i in range(0, len(input_text), batch_size):
+        text_predict, sequence_length = frozen_sess.run([frozen_model.output_text_predict,
+            frozen_model.output_sequence_length], feed_dict={frozen_model.input_text: input_text[i:i+batch_size]})
+        predict_data.extend([list(pred[:seq_len]) for pred, seq_len in zip(text_predict, sequence_length)])
+    
+    invalid_labels = [ hyperparams.data_label_unk, hyperparams.data_label_pad ]
+    extrinsic_eval_predict(eval_logger, eval_summary_writer, input_data, predict_data,
+        hyperparams.train_eval_metric, invalid_labels, 0, 0)
+    
+    eval_summary_writer.close_writer()
+    logger.log_print("##### finish frozen evaluation #####")
+
 def export(logger,
            hyperparams,
            enable_debug=False):   
     config_proto = get_config_proto(hyperparams.device_log_device_placement,
         hyperparams.device_allow_soft_placement, hyperparams.device_allow_growth,
-        hyperparams.device_per_process_gpu_memory_fraction)
+        hyperparams.device_per_process_gpu_memory_fraction, hyperparams.device_xla_jit_enable)
     
     logger.log_print("##### create online model #####")
     online_model = create_online_model(logger, hyperparams)
@@ -255,6 +305,8 @@ def main(args):
         evaluate(logger, hyperparams, enable_debug=False)
     elif (args.mode == 'eval_debug'):
         evaluate(logger, hyperparams, enable_debug=True)
+    elif (args.mode == 'eval_frozen'):
+        evaluate_frozen(logger, hyperparams)
     elif (args.mode == 'export'):
         export(logger, hyperparams, enable_debug=False)
     elif (args.mode == 'export_debug'):
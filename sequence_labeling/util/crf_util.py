@@ -0,0 +1,219 @@
+import numpy as np
+import tensorflow as tf
+
+try:
+    from numba import njit, prange
+    numba_enable = True
+except ImportError:
+    def njit(*args, **kwargs):
+        """keep module importable when numba is not installed, numba decode is rejected at graph build"""
+        return lambda func: func
+
+    prange = range
+    numba_enable = False
+
+try:
+    from numba import cuda, float32
+except ImportError:
+    cuda = None
+
+__all__ = ["viterbi_decode", "viterbi_decode_cuda", "create_viterbi_decode",
+           "crf_log_norm", "crf_sequence_score", "crf_log_likelihood"]
+
+@njit(parallel=True, fastmath=True)
+def viterbi_decode(emission,
+                   transition,
+                   sequence_length):
+    """decode best tag sequence for each example in batch with viterbi algorithm"""
+    batch_size, max_length, num_tag = emission.shape
+    output_tag = np.zeros((batch_size, max_length), dtype=np.int32)
+    for b in prange(batch_size):
+        seq_length = min(sequence_length[b], max_length)
+        if seq_length <= 0:
+            continue
+
+        score = np.empty((seq_length, num_tag), dtype=emission.dtype)
+        backpointer = np.zeros((seq_length, num_tag), dtype=np.int32)
+        for j in range(num_tag):
+            score[0, j] = emission[b, 0, j]
+
+        for t in range(1, seq_length):
+            for j in range(num_tag):
+                best_score = score[t-1, 0] + transition[0, j]
+                best_tag = 0
+                for i in range(1, num_tag):
+                    curr_score = score[t-1, i] + transition[i, j]
+                    if curr_score > best_score:
+                        best_score = curr_score
+                        best_tag = i
+
+                score[t, j] = best_score + emission[b, t, j]
+                backpointer[t, j] = best_tag
+
+        best_tag = 0
+        for j in range(1, num_tag):
+            if score[seq_length-1, j] > score[seq_length-1, best_tag]:
+                best_tag = j
+
+        output_tag[b, seq_length-1] = best_tag
+        for t in range(seq_length-1, 0, -1):
+            best_tag = backpointer[t, best_tag]
+            output_tag[b, t-1] = best_tag
+
+    return output_tag
+
+MAX_CUDA_NUM_TAG = 1024
+
+if cuda is not None:
+    @cuda.jit
+    def _viterbi_forward_kernel(emission,
+                                transition,
+                                sequence_length,
+                                backpointer,
+                                last_score):
+        """compute viterbi forward pass on gpu, one block per sequence and one thread per tag"""
+        b = cuda.blockIdx.x
+        j = cuda.threadIdx.x
+        max_length = emission.shape[1]
+        num_tag = emission.shape[2]
+        seq_length = min(sequence_length[b], max_length)
+        
+        score = cuda.shared.array(shape=(2, MAX_CUDA_NUM_TAG), dtype=float32)
+        if j < num_tag:
+            score[0, j] = emission[b, 0, j]
+        
+        cuda.syncthreads()
+        
+        for t in range(1, seq_length):
+            prev = (t - 1) % 2
+            curr = t % 2
+            if j < num_tag:
+                best_score = score[prev, 0] + transition[0, j]
+                best_tag = 0
+                for i in range(1, num_tag):
+                    curr_score = score[prev, i] + transition[i, j]
+                    if curr_score > best_score:
+                        best_score = curr_score
+                        best_tag = i
+                
+                score[curr, j] = best_score + emission[b, t, j]
+                backpointer[b, t, j] = best_tag
+            
+            cuda.syncthreads()
+        
+        if j < num_tag and seq_length > 0:
+            last_score[b, j] = score[(seq_length - 1) % 2, j]
+
+@njit(parallel=True)
+def _viterbi_backtrack(backpointer,
+                       last_score,
+                       sequence_length):
+    """backtrack best tag sequence for each example in batch"""
+    batch_size, max_length, num_tag = backpointer.shape
+    output_tag = np.zeros((batch_size, max_length), dtype=np.int32)
+    for b in prange(batch_size):
+        seq_length = min(sequence_length[b], max_length)
+        if seq_length <= 0:
+            continue
+        
+        best_tag = 0
+        for j in range(1, num_tag):
+            if last_score[b, j] > last_score[b, best_tag]:
+                best_tag = j
+        
+        output_tag[b, seq_length-1] = best_tag
+        for t in range(seq_length-1, 0, -1):
+            best_tag = backpointer[b, t, best_tag]
+            output_tag[b, t-1] = best_tag
+    
+    return output_tag
+
+def viterbi_decode_cuda(emission,
+                        transition,
+                        sequence_length):
+    """decode best tag sequence with viterbi forward pass on gpu and backtracking on cpu"""
+    if cuda is None or not cuda.is_available():
+        raise EnvironmentError("numba cuda decode requires numba with an available cuda device")
+    
+    batch_size, max_length, num_tag = emission.shape
+    if num_tag > MAX_CUDA_NUM_TAG:
+        raise ValueError("numba cuda decode supports at most {0} tags".format(MAX_CUDA_NUM_TAG))
+    
+    if batch_size == 0 or max_length == 0:
+        return np.zeros((batch_size, max_length), dtype=np.int32)
+    
+    """py_func hands over host arrays, so emission is copied to gpu and backpointer is copied back for each batch"""
+    backpointer = cuda.device_array((batch_size, max_length, num_tag), dtype=np.int32)
+    last_score = cuda.device_array((batch_size, num_tag), dtype=np.float32)
+    _viterbi_forward_kernel[batch_size, num_tag](cuda.to_device(emission.astype(np.float32)),
+        cuda.to_device(transition.astype(np.float32)), cuda.to_device(sequence_length), backpointer, last_score)
+    
+    return _viterbi_backtrack(backpointer.copy_to_host(), last_score.copy_to_host(), sequence_length)
+
+def create_viterbi_decode(emission,
+                          transition,
+                          sequence_length,
+                          use_cuda=False):
+    """create viterbi decode op which runs numba kernel outside of tensorflow graph"""
+    if numba_enable == False:
+        raise EnvironmentError("numba decode requires numba to be installed")
+    
+    if use_cuda == True and (cuda is None or not cuda.is_available()):
+        raise EnvironmentError("numba cuda decode requires numba with an available cuda device")
+    
+    decode_func = viterbi_decode_cuda if use_cuda == True else viterbi_decode
+    output_tag = tf.py_func(decode_func, [emission, transition, sequence_length], tf.int32, stateful=False)
+    output_tag.set_shape(sequence_length.get_shape().concatenate(emission.get_shape()[1:2]))
+
+    return output_tag
+
+def crf_log_norm(emission,
+                 transition,
+                 sequence_length):
+    """compute log partition function of crf with forward algorithm in log-space"""
+    max_length = tf.shape(emission)[1]
+    
+    def forward(t, alpha):
+        """compute forward variable for step t"""
+        next_alpha = tf.reduce_logsumexp(tf.expand_dims(alpha, axis=2) + tf.expand_dims(transition, axis=0), axis=1)
+        next_alpha = next_alpha + emission[:,t,:]
+        next_alpha = tf.where(tf.less(t, sequence_length), next_alpha, alpha)
+        
+        return t + 1, next_alpha
+    
+    _, alpha = tf.while_loop(lambda t, alpha: tf.less(t, max_length), forward,
+        [tf.constant(1, dtype=tf.int32), emission[:,0,:]], parallel_iterations=32)
+    
+    log_norm = tf.reduce_logsumexp(alpha, axis=1)
+    log_norm = tf.where(tf.greater(sequence_length, 0), log_norm, tf.zeros_like(log_norm))
+    
+    return log_norm
+
+def crf_sequence_score(emission,
+                       label,
+                       sequence_length,
+                       transition):
+    """compute unnormalized score of label sequence"""
+    max_length = tf.shape(emission)[1]
+    num_tag = tf.shape(emission)[2]
+    sequence_mask = tf.sequence_mask(sequence_length, max_length, dtype=emission.dtype)
+    
+    unary_score = tf.reduce_sum(emission * tf.one_hot(label, num_tag, dtype=emission.dtype), axis=-1)
+    unary_score = tf.reduce_sum(unary_score * sequence_mask, axis=-1)
+    
+    binary_index = label[:,:-1] * num_tag + label[:,1:]
+    binary_score = tf.gather(tf.reshape(transition, shape=[-1]), binary_index)
+    binary_score = tf.reduce_sum(binary_score * sequence_mask[:,1:], axis=-1)
+    
+    return unary_score + binary_score
+
+def crf_log_likelihood(emission,
+                       label,
+                       sequence_length,
+                       transition):
+    """compute log-likelihood of label sequence under crf"""
+    sequence_score = crf_sequence_score(emission, label, sequence_length, transition)
+    log_norm = crf_log_norm(emission, transition, sequence_length)
+    log_likelihood = sequence_score - log_norm
+    
+    return log_likelihood
@@ -9,9 +9,10 @@ import tensorflow as tf
 from util.default_util import *
 
 __all__ = ["DataPipeline", "create_online_pipeline", "create_dynamic_pipeline", "create_data_pipeline",
-           "create_text_dataset", "create_label_dataset", "create_ext_dataset",
-           "generate_word_feat", "generate_char_feat", "generate_label_feat",
+           "create_length_dataset", "create_bucket_dataset", "create_text_dataset", "create_label_dataset", "create_ext_dataset",
+           "generate_word_feat", "generate_char_feat", "generate_label_feat", "generate_vocab_char_feat",
            "create_embedding_file", "load_embedding_file", "convert_embedding",
+           "create_embedding_array_file", "load_embedding_array_file",
            "create_vocab_file", "load_vocab_file", "process_vocab_table",
            "create_word_vocab", "create_char_vocab", "create_label_vocab",
            "load_tsv_data", "load_json_data", "load_sequence_data",
@@ -20,7 +21,7 @@ __all__ = ["DataPipeline", "create_online_pipeline", "create_dynamic_pipeline",
 class DataPipeline(collections.namedtuple("DataPipeline",
     ("initializer", "word_vocab_size", "char_vocab_size", "input_text_word", "input_text_char",
      "input_label", "input_ext", "input_text_word_mask", "input_text_char_mask", "input_label_mask", "input_ext_mask",
-     "label_inverted_index", "input_text_placeholder", "input_word_placeholder", "input_char_placeholder",
+     "input_sequence_length", "label_inverted_index", "input_text_placeholder", "input_word_placeholder", "input_char_placeholder",
      "input_label_placeholder", "input_ext_placeholder", "data_size_placeholder", "batch_size_placeholder"))):
     pass
 
@@ -51,27 +52,28 @@ def create_online_pipeline(external_index_enable,
     input_ext_mask = None
     
     if external_index_enable == True:
-        input_word_placeholder = tf.placeholder(shape=[None, None], dtype=tf.int32)
-        input_char_placeholder = tf.placeholder(shape=[None, None, None], dtype=tf.int32)
-        input_ext_placeholder = tf.placeholder(shape=[None, None, None], dtype=tf.float32)
+        input_word_placeholder = tf.placeholder(shape=[None, None], dtype=tf.int32, name="input_word")
+        input_char_placeholder = tf.placeholder(shape=[None, None, None], dtype=tf.int32, name="input_char")
+        input_ext_placeholder = tf.placeholder(shape=[None, None, None], dtype=tf.float32, name="input_ext")
+        """padding is always the last entry in vocab table, so pad id is static and no table lookup is needed"""
         if word_feat_enable == True:
-            word_pad_id = tf.cast(word_vocab_index.lookup(tf.constant(word_pad)), dtype=tf.int32)
+            word_pad_id = tf.constant(word_vocab_size-1, shape=[], dtype=tf.int32)
             input_text_word = tf.expand_dims(input_word_placeholder[:,:word_max_size], axis=-1)
             input_text_word_mask = tf.cast(tf.not_equal(input_text_word, word_pad_id), dtype=tf.float32)
         
         if char_feat_enable == True:
-            char_pad_id = tf.cast(char_vocab_index.lookup(tf.constant(char_pad)), dtype=tf.int32)
+            char_pad_id = tf.constant(char_vocab_size-1, shape=[], dtype=tf.int32)
             input_text_char = input_char_placeholder[:,:word_max_size,:char_max_size]
             input_text_char_mask = tf.cast(tf.not_equal(input_text_char, char_pad_id), dtype=tf.float32)
         
         if ext_feat_enable == True:
-            ext_pad_id = tf.cast(word_vocab_index.lookup(tf.constant(word_pad)), dtype=tf.int32)
+            ext_pad_id = tf.constant(word_vocab_size-1, shape=[], dtype=tf.int32)
             input_ext = input_ext_placeholder[:,:ext_max_size,:ext_embed_dim]
             input_ext_mask = tf.expand_dims(input_word_placeholder[:,:ext_max_size], axis=-1)
             input_ext_mask = tf.cast(tf.not_equal(input_ext_mask, ext_pad_id), dtype=tf.float32)
     else:
-        input_text_placeholder = tf.placeholder(shape=[None], dtype=tf.string)
-        input_ext_placeholder = tf.placeholder(shape=[None, None, None], dtype=tf.float32)
+        input_text_placeholder = tf.placeholder(shape=[None], dtype=tf.string, name="input_text")
+        input_ext_placeholder = tf.placeholder(shape=[None, None, None], dtype=tf.float32, name="input_ext")
         if word_feat_enable == True:
             word_pad_id = tf.cast(word_vocab_index.lookup(tf.constant(word_pad)), dtype=tf.int32)
             input_text_word = tf.map_fn(lambda sent: generate_word_feat(sent,
@@ -91,10 +93,16 @@ def create_online_pipeline(external_index_enable,
                 word_vocab_index, word_max_size, word_pad), input_text_placeholder, dtype=tf.int32)
             input_ext_mask = tf.cast(tf.not_equal(input_ext_mask, ext_pad_id), dtype=tf.float32)
     
+    if word_feat_enable == True:
+        input_sequence_length = tf.cast(tf.reduce_sum(input_text_word_mask, axis=[-1,-2]), dtype=tf.int32)
+    else:
+        input_sequence_length = None
+    
     return DataPipeline(initializer=None, word_vocab_size=word_vocab_size, char_vocab_size=char_vocab_size,
         input_text_word=input_text_word, input_text_char=input_text_char, input_label=None, input_ext=input_ext,
         input_text_word_mask=input_text_word_mask, input_text_char_mask=input_text_char_mask, input_label_mask=None,
-        input_ext_mask=input_ext_mask, label_inverted_index=label_inverted_index, input_text_placeholder=input_text_placeholder,
+        input_ext_mask=input_ext_mask, input_sequence_length=input_sequence_length,
+        label_inverted_index=label_inverted_index, input_text_placeholder=input_text_placeholder,
         input_word_placeholder=input_word_placeholder, input_char_placeholder=input_char_placeholder,
         input_label_placeholder=None, input_ext_placeholder=None, data_size_placeholder=None, batch_size_placeholder=None)
 
@@ -147,6 +155,9 @@ def create_dynamic_pipeline(input_text_word_dataset,
     dataset = tf.data.Dataset.zip((input_text_word_dataset,
         input_text_char_dataset, input_label_dataset, input_ext_dataset))
     
+    label_pad_id = tf.cast(label_vocab_index.lookup(tf.constant(label_pad)), dtype=tf.float32)
+    dataset = create_length_dataset(dataset, label_pad_id)
+    
     if enable_shuffle == True:
         dataset = dataset.shuffle(buffer_size, random_seed)
     
@@ -170,7 +181,6 @@ def create_dynamic_pipeline(input_text_word_dataset,
         input_text_char = None
         input_text_char_mask = None
     
-    label_pad_id = tf.cast(label_vocab_index.lookup(tf.constant(label_pad)), dtype=tf.float32)
     input_label = tf.cast(batch_data[2], dtype=tf.float32)
     input_label_mask = tf.cast(tf.not_equal(input_label, label_pad_id), dtype=tf.float32)
     
@@ -182,10 +192,13 @@ def create_dynamic_pipeline(input_text_word_dataset,
         input_ext = None
         input_ext_mask = None
     
+    input_sequence_length = tf.cast(batch_data[4], dtype=tf.int32)
+    
     return DataPipeline(initializer=iterator.initializer, word_vocab_size=word_vocab_size, char_vocab_size=char_vocab_size,
         input_text_word=input_text_word, input_text_char=input_text_char, input_label=input_label, input_ext=input_ext,
         input_text_word_mask=input_text_word_mask, input_text_char_mask=input_text_char_mask,
-        input_label_mask=input_label_mask, input_ext_mask=input_ext_mask, label_inverted_index=label_inverted_index,
+        input_label_mask=input_label_mask, input_ext_mask=input_ext_mask,
+        input_sequence_length=input_sequence_length, label_inverted_index=label_inverted_index,
         input_text_placeholder=input_text_placeholder, input_word_placeholder=None, input_char_placeholder=None,
         input_label_placeholder=input_label_placeholder, input_ext_placeholder=input_ext_placeholder,
         data_size_placeholder=data_size_placeholder, batch_size_placeholder=batch_size_placeholder)
@@ -209,6 +222,9 @@ def create_data_pipeline(input_text_word_dataset,
                          random_seed,
                          enable_shuffle,
                          buffer_size,
+                         enable_bucket,
+                         bucket_boundaries,
+                         word_max_size,
                          data_size,
                          batch_size):
     """create data pipeline for sequence labeling model"""
@@ -236,10 +252,17 @@ def create_data_pipeline(input_text_word_dataset,
     dataset = tf.data.Dataset.zip((input_text_word_dataset,
         input_text_char_dataset, input_label_dataset, input_ext_dataset))
     
+    label_pad_id = tf.cast(label_vocab_index.lookup(tf.constant(label_pad)), dtype=tf.float32)
+    dataset = create_length_dataset(dataset, label_pad_id)
+    
     if enable_shuffle == True:
         dataset = dataset.shuffle(buffer_size, random_seed)
     
-    dataset = dataset.batch(batch_size=batch_size)
+    if enable_bucket == True:
+        dataset = create_bucket_dataset(dataset, bucket_boundaries, word_max_size, batch_size)
+    else:
+        dataset = dataset.batch(batch_size=batch_size)
+    
     dataset = dataset.prefetch(buffer_size=1)
     
     iterator = dataset.make_initializable_iterator()
@@ -259,7 +282,6 @@ def create_data_pipeline(input_text_word_dataset,
         input_text_char = None
         input_text_char_mask = None
     
-    label_pad_id = tf.cast(label_vocab_index.lookup(tf.constant(label_pad)), dtype=tf.float32)
     input_label = tf.cast(batch_data[2], dtype=tf.float32)
     input_label_mask = tf.cast(tf.not_equal(input_label, label_pad_id), dtype=tf.float32)
     
@@ -271,13 +293,54 @@ def create_data_pipeline(input_text_word_dataset,
         input_ext = None
         input_ext_mask = None
     
+    input_sequence_length = tf.cast(batch_data[4], dtype=tf.int32)
+    
     return DataPipeline(initializer=iterator.initializer, word_vocab_size=word_vocab_size, char_vocab_size=char_vocab_size,
         input_text_word=input_text_word, input_text_char=input_text_char, input_label=input_label, input_ext=input_ext,
         input_text_word_mask=input_text_word_mask, input_text_char_mask=input_text_char_mask,
-        input_label_mask=input_label_mask, input_ext_mask=input_ext_mask, label_inverted_index=label_inverted_index,
+        input_label_mask=input_label_mask, input_ext_mask=input_ext_mask,
+        input_sequence_length=input_sequence_length, label_inverted_index=label_inverted_index,
         input_text_placeholder=None, input_word_placeholder=None, input_char_placeholder=None, 
         input_label_placeholder=None, input_ext_placeholder=None, data_size_placeholder=None, batch_size_placeholder=None)
 
+def create_length_dataset(input_dataset,
+                          label_pad_id):
+    """create dataset with sequence length of each example attached, computed from label"""
+    def attach_sequence_length(input_word, input_char, input_label, input_ext):
+        """attach sequence length based on label"""
+        input_sequence_length = tf.count_nonzero(tf.not_equal(input_label, label_pad_id), dtype=tf.int32)
+        
+        return input_word, input_char, input_label, input_ext, input_sequence_length
+    
+    dataset = input_dataset.map(attach_sequence_length)
+    
+    return dataset
+
+def create_bucket_dataset(input_dataset,
+                          bucket_boundaries,
+                          word_max_size,
+                          batch_size):
+    """create batched dataset by bucketing sequences with similar length and trimming padding of each batch"""
+    """trim each batch to upper boundary of its bucket, so that batch length is one of a bounded set of shapes"""
+    bucket_lengths = tf.constant(sorted(set([min(boundary, word_max_size)
+        for boundary in bucket_boundaries] + [word_max_size])), dtype=tf.int32)
+    
+    def trim_batch(input_word, input_char, input_label, input_ext, input_sequence_length):
+        """trim batch to upper boundary of bucket which covers max sequence length within batch"""
+        batch_length = tf.reduce_max(input_sequence_length)
+        max_length = tf.reduce_min(tf.boolean_mask(bucket_lengths, tf.greater_equal(bucket_lengths, batch_length)))
+        
+        return (input_word[:,:max_length], input_char[:,:max_length],
+            input_label[:,:max_length], input_ext[:,:max_length], input_sequence_length)
+    
+    bucket_batch_sizes = [batch_size] * (len(bucket_boundaries) + 1)
+    dataset = input_dataset.apply(tf.data.experimental.bucket_by_sequence_length(
+        element_length_func=lambda input_word, input_char, input_label, input_ext, input_sequence_length: input_sequence_length,
+        bucket_boundaries=bucket_boundaries, bucket_batch_sizes=bucket_batch_sizes))
+    dataset = dataset.map(trim_batch)
+    
+    return dataset
+
 def create_text_dataset(input_dataset,
                         word_vocab_index,
                         word_max_size,
@@ -364,6 +427,29 @@ def generate_char_feat(sentence,
     
     return sentence_chars
 
+def generate_vocab_char_feat(word_vocab_inverted_index,
+                             word_vocab_size,
+                             char_vocab_index,
+                             char_max_size,
+                             char_pad):
+    """generate characters for each word in vocab"""
+    def word_to_char(word):
+        """process characters for word"""
+        word_chars = tf.string_split([word], delimiter='').values
+        word_chars = tf.concat([word_chars[:char_max_size],
+            tf.constant(char_pad, shape=[char_max_size])], axis=0)
+        word_chars = tf.reshape(word_chars[:char_max_size], shape=[char_max_size])
+        
+        return word_chars
+    
+    char_pad_id = tf.cast(char_vocab_index.lookup(tf.constant(char_pad)), dtype=tf.int32)
+    vocab_words = word_vocab_inverted_index.lookup(tf.range(word_vocab_size, dtype=tf.int64))
+    vocab_chars = tf.map_fn(word_to_char, vocab_words)
+    vocab_chars = tf.cast(char_vocab_index.lookup(vocab_chars), dtype=tf.int32)
+    vocab_chars_mask = tf.cast(tf.not_equal(vocab_chars, char_pad_id), dtype=tf.float32)
+    
+    return vocab_chars, vocab_chars_mask
+
 def generate_label_feat(sentence,
                         label_vocab_index,
                         label_max_size,
@@ -432,12 +518,38 @@ def load_embedding_file(embedding_file,
 
 def convert_embedding(embedding_lookup):
     if embedding_lookup is not None:
-        embedding = [v for k,v in embedding_lookup.items()]
+        embedding = np.array([v for k,v in embedding_lookup.items()], dtype=np.float32)
     else:
         embedding = None
     
     return embedding
 
+def create_embedding_array_file(embedding_array_file,
+                                embedding_vocab_file,
+                                embedding_array,
+                                embedding_vocab):
+    """create embedding array file in numpy format, along with vocab file listing word of each row"""
+    np.save(embedding_array_file, embedding_array)
+    with codecs.getwriter("utf-8")(open(embedding_vocab_file, "wb")) as file:
+        for vocab in embedding_vocab:
+            file.write("{0}\n".format(vocab))
+
+def load_embedding_array_file(embedding_array_file,
+                              embedding_vocab_file):
+    """load embedding array from numpy file as memory-mapped array, along with word of each row"""
+    if os.path.exists(embedding_array_file) and os.path.exists(embedding_vocab_file):
+        embedding_array = np.load(embedding_array_file, mmap_mode="r")
+        with codecs.getreader("utf-8")(open(embedding_vocab_file, "rb")) as file:
+            embedding_vocab = [line.strip() for line in file]
+        
+        if len(embedding_vocab) != len(embedding_array):
+            raise ValueError("embedding vocab file {0} doesn't match embedding array file {1}".format(
+                embedding_vocab_file, embedding_array_file))
+        
+        return embedding_array, embedding_vocab
+    else:
+        raise FileNotFoundError("embedding array file not found")
+
 def create_vocab_file(vocab_file,
                       vocab_table):
     """create vocab file based on vocab table"""
@@ -613,8 +725,15 @@ def prepare_text_data(logger,
                       char_feat_enable):
     """prepare text data"""    
     word_embed_data = None
+    word_embed_array = None
+    word_embed_array_vocab = None
+    word_embed_array_file = "{0}.npy".format(word_embed_file)
+    word_embed_array_vocab_file = "{0}.vocab".format(word_embed_file)
     if pretrain_word_embed == True:
-        if os.path.exists(word_embed_file):
+        if os.path.exists(word_embed_array_file) and os.path.exists(word_embed_array_vocab_file):
+            logger.log_print("# loading word embeddings from {0}".format(word_embed_array_file))
+            word_embed_array, word_embed_array_vocab = load_embedding_array_file(word_embed_array_file, word_embed_array_vocab_file)
+        elif os.path.exists(word_embed_file):
             logger.log_print("# loading word embeddings from {0}".format(word_embed_file))
             word_embed_data = load_embedding_file(word_embed_file, word_embed_dim, word_unk, word_pad)
         elif os.path.exists(full_word_embed_file):
@@ -623,9 +742,12 @@ def prepare_text_data(logger,
         else:
             raise ValueError("{0} or {1} must be provided".format(word_embed_file, full_word_embed_file))
         
-        word_embed_size = len(word_embed_data) if word_embed_data is not None else 0
+        word_embed_size = len(word_embed_data) if word_embed_data is not None else len(word_embed_array)
         logger.log_print("# word embedding table has {0} words".format(word_embed_size))
     
+    """vocab is filtered by words of embedding array in the same way as by words of embedding file"""
+    word_embed_lookup = word_embed_data if word_embed_array_vocab is None else set(word_embed_array_vocab)
+    
     word_vocab = None
     word_vocab_index = None
     word_vocab_inverted_index = None
@@ -634,13 +756,13 @@ def prepare_text_data(logger,
         word_vocab = load_vocab_file(word_vocab_file)
         (word_vocab_table, word_vocab_size, word_vocab_index,
             word_vocab_inverted_index) = process_vocab_table(word_vocab, word_vocab_size,
-            word_vocab_threshold, word_embed_data, word_unk, word_pad)
+            word_vocab_threshold, word_embed_lookup, word_unk, word_pad)
     elif input_data is not None:
         logger.log_print("# creating word vocab table from input data")
         word_vocab = create_word_vocab(input_data)
         (word_vocab_table, word_vocab_size, word_vocab_index,
             word_vocab_inverted_index) = process_vocab_table(word_vocab, word_vocab_size,
-            word_vocab_threshold, word_embed_data, word_unk, word_pad)
+            word_vocab_threshold, word_embed_lookup, word_unk, word_pad)
         logger.log_print("# creating word vocab file {0}".format(word_vocab_file))
         create_vocab_file(word_vocab_file, word_vocab_table)
     else:
@@ -671,14 +793,29 @@ def prepare_text_data(logger,
 
         logger.log_print("# char vocab table has {0} chars".format(char_vocab_size))
     
-    if word_embed_data is not None and word_vocab_table is not None:
+    if word_embed_array is not None:
+        """rows are matched to vocab table by word, so array written for another vocab table is gathered instead"""
+        word_embed_array_index = { k: i for i, k in enumerate(word_embed_array_vocab) }
+        if any(k not in word_embed_array_index for k in word_vocab_table):
+            raise ValueError("word embedding array {0} doesn't match word vocab table".format(word_embed_array_file))
+        
+        word_embed_row_list = [word_embed_array_index[k] for k in word_vocab_table]
+        if word_embed_row_list != list(range(len(word_embed_array))):
+            logger.log_print("# gathering word embeddings for word vocab table from {0}".format(word_embed_array_file))
+            word_embed_array = word_embed_array[word_embed_row_list]
+        
+        word_embed_data = word_embed_array
+    elif word_embed_data is not None and word_vocab_table is not None:
         word_embed_data = { k: word_embed_data[k] for k in word_vocab_table if k in word_embed_data }
         logger.log_print("# word embedding table has {0} words after filtering".format(len(word_embed_data)))
         if not os.path.exists(word_embed_file):
             logger.log_print("# creating word embedding file {0}".format(word_embed_file))
             create_embedding_file(word_embed_file, word_embed_data)
         
+        word_embed_array_vocab = list(word_embed_data.keys())
         word_embed_data = convert_embedding(word_embed_data)
+        logger.log_print("# creating word embedding array file {0}".format(word_embed_array_file))
+        create_embedding_array_file(word_embed_array_file, word_embed_array_vocab_file, word_embed_data, word_embed_array_vocab)
     
     return (word_embed_data, word_vocab_size, word_vocab_index, word_vocab_inverted_index,
         char_vocab_size, char_vocab_index, char_vocab_inverted_index)
@@ -1,13 +1,21 @@
 import numpy as np
 import tensorflow as tf
 
-__all__ = ["EPSILON", "MAX_INT", "MIN_FLOAT", "TRANSFERABLE_VARIABLES",
+__all__ = ["EPSILON", "MAX_INT", "MIN_FLOAT", "TRANSFERABLE_VARIABLES", "CACHE_VARIABLES",
+           "CUDNN_VARIABLES", "CUDNN_SAVEABLES", "FROZEN_DIR", "FROZEN_MODEL_NAME", "QUANTIZED_MODEL_NAME", "AOT_CONFIG_NAME",
            "check_tensorflow_version", "safe_exp", "get_config_proto", "get_device_spec"]
 
 EPSILON = 1e-30
 MAX_INT = 2147483647
 MIN_FLOAT = -1e30
 TRANSFERABLE_VARIABLES = "transferable_variables"
+CACHE_VARIABLES = "cache_variables"
+CUDNN_VARIABLES = "cudnn_variables"
+CUDNN_SAVEABLES = "cudnn_saveables"
+FROZEN_DIR = "frozen"
+FROZEN_MODEL_NAME = "model_frozen.pb"
+QUANTIZED_MODEL_NAME = "model_frozen.quantized.pb"
+AOT_CONFIG_NAME = "model_frozen.tfcompile.pbtxt"
 
 def check_tensorflow_version():
     """check tensorflow version in current environment"""
@@ -28,13 +36,17 @@ def safe_exp(value):
 def get_config_proto(log_device_placement,
                      allow_soft_placement,
                      allow_growth,
-                     per_process_gpu_memory_fraction):
+                     per_process_gpu_memory_fraction,
+                     xla_jit_enable=False):
     """get config proto for device setting"""
     config_proto = tf.ConfigProto(log_device_placement=log_device_placement,
         allow_soft_placement=allow_soft_placement)
     config_proto.gpu_options.allow_growth = allow_growth
     config_proto.gpu_options.per_process_gpu_memory_fraction = per_process_gpu_memory_fraction
     
+    if xla_jit_enable == True:
+        config_proto.graph_options.optimizer_options.global_jit_level = tf.OptimizerOptions.ON_1
+    
     return config_proto
 
 def get_device_spec(device_id, num_gpus):
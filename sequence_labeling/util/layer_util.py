@@ -212,7 +212,8 @@ def create_recurrent_layer(recurrent_type,
                            num_gpus,
                            default_gpu_id,
                            random_seed,
-                           trainable):
+                           trainable,
+                           cudnn_enable):
     """create recurrent layer"""
     scope = "recurrent/{0}".format(recurrent_type)
     if recurrent_type == "uni":
@@ -224,7 +225,7 @@ def create_recurrent_layer(recurrent_type,
         recurrent_layer = BiRNN(num_layer=num_layer, unit_dim=unit_dim, cell_type=cell_type,
             activation=activation, dropout=dropout, forget_bias=forget_bias, residual_connect=residual_connect,
             attention_mechanism=attention_mechanism, num_gpus=num_gpus, default_gpu_id=default_gpu_id,
-            random_seed=random_seed, trainable=trainable, scope=scope)
+            random_seed=random_seed, trainable=trainable, cudnn_enable=cudnn_enable, scope=scope)
     else:
         raise ValueError("unsupported recurrent type {0}".format(recurrent_type))
     
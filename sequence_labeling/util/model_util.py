@@ -1,4 +1,5 @@
 import collections
+import os.path
 
 import numpy as np
 import tensorflow as tf
@@ -6,10 +7,11 @@ import tensorflow as tf
 from model.seq_crf import *
 from model.att_crf import *
 from model.seq_softmax import *
+from util.default_util import *
 from util.data_util import *
 
-__all__ = ["TrainModel", "EvalModel", "OnlineModel",
-           "create_train_model", "create_eval_model", "create_online_model",
+__all__ = ["TrainModel", "EvalModel", "OnlineModel", "FrozenModel",
+           "create_train_model", "create_eval_model", "create_online_model", "create_frozen_model",
            "init_model", "load_model"]
 
 class TrainModel(collections.namedtuple("TrainModel",
@@ -23,6 +25,11 @@ class EvalModel(collections.namedtuple("EvalModel",
 class OnlineModel(collections.namedtuple("OnlineModel", ("model", "data_pipeline"))):
     pass
 
+class FrozenModel(collections.namedtuple("FrozenModel",
+    ("graph", "initializer", "input_text", "input_word", "input_char",
+     "output_predict", "output_text_predict", "output_sequence_length"))):
+    pass
+
 def create_train_model(logger,
                        hyperparams):
     graph = tf.Graph()
@@ -104,6 +111,7 @@ def create_train_model(logger,
                 char_vocab_size, char_vocab_index, hyperparams.data_char_pad, hyperparams.model_char_feat_enable,
                 label_vocab_index, label_vocab_inverted_index, hyperparams.data_label_pad, hyperparams.model_ext_feat_enable,
                 hyperparams.train_random_seed, hyperparams.train_enable_shuffle, hyperparams.train_shuffle_buffer_size,
+                hyperparams.data_bucket_enable, hyperparams.data_bucket_boundaries, hyperparams.data_text_word_size,
                 len(input_data), hyperparams.train_batch_size)
         
         model_creator = get_model_creator(hyperparams.model_type)
@@ -192,7 +200,13 @@ def create_eval_model(logger,
                 word_vocab_size, word_vocab_index, hyperparams.data_word_pad, hyperparams.model_word_feat_enable,
                 char_vocab_size, char_vocab_index, hyperparams.data_char_pad, hyperparams.model_char_feat_enable,
                 label_vocab_index, label_vocab_inverted_index, hyperparams.data_label_pad, hyperparams.model_ext_feat_enable,
-                None, False, 0, len(input_data), hyperparams.train_eval_batch_size)
+                None, False, 0, False, None, hyperparams.data_text_word_size, len(input_data), hyperparams.train_eval_batch_size)
+        
+        vocab_char_feat_enable = hyperparams.model_char_feat_cache_enable or hyperparams.model_fusion_cache_enable
+        if hyperparams.model_char_feat_enable == True and vocab_char_feat_enable == True:
+            (external_data["word_vocab_char"],
+                external_data["word_vocab_char_mask"]) = generate_vocab_char_feat(word_vocab_inverted_index,
+                word_vocab_size, char_vocab_index, hyperparams.data_text_char_size, hyperparams.data_char_pad)
         
         model_creator = get_model_creator(hyperparams.model_type)
         model = model_creator(logger=logger, hyperparams=hyperparams, data_pipeline=data_pipeline,
@@ -220,6 +234,12 @@ def create_online_model(logger,
     if word_embed_data is not None:
         external_data["word_embedding"] = word_embed_data
     
+    vocab_char_feat_enable = hyperparams.model_char_feat_cache_enable or hyperparams.model_fusion_cache_enable
+    if hyperparams.model_char_feat_enable == True and vocab_char_feat_enable == True:
+        (external_data["word_vocab_char"],
+            external_data["word_vocab_char_mask"]) = generate_vocab_char_feat(word_vocab_inverted_index,
+            word_vocab_size, char_vocab_index, hyperparams.data_text_char_size, hyperparams.data_char_pad)
+    
     logger.log_print("# create online data pipeline")
     data_pipeline = create_online_pipeline(hyperparams.data_external_index_enable,
         word_vocab_size, word_vocab_index, hyperparams.data_text_word_size, hyperparams.data_word_pad,
@@ -233,6 +253,32 @@ def create_online_model(logger,
 
     return OnlineModel(model=model, data_pipeline=data_pipeline)
 
+def create_frozen_model(logger,
+                        hyperparams):
+    if hyperparams.train_model_quantize_enable == True:
+        frozen_file = os.path.join(hyperparams.train_ckpt_output_dir, FROZEN_DIR, QUANTIZED_MODEL_NAME)
+    else:
+        frozen_file = os.path.join(hyperparams.train_ckpt_output_dir, FROZEN_DIR, FROZEN_MODEL_NAME)
+    if not tf.gfile.Exists(frozen_file):
+        raise FileNotFoundError("frozen model file doesn't exist")
+    
+    logger.log_print("# load frozen model from {0}".format(frozen_file))
+    with tf.gfile.GFile(frozen_file, "rb") as file:
+        graph_def = tf.GraphDef()
+        graph_def.ParseFromString(file.read())
+    
+    graph = tf.Graph()
+    with graph.as_default():
+        tf.import_graph_def(graph_def, name="")
+    
+    node_names = [node.name for node in graph_def.node]
+    get_tensor = lambda name: graph.get_tensor_by_name("{0}:0".format(name)) if name in node_names else None
+    
+    return FrozenModel(graph=graph, initializer=graph.get_operation_by_name("infer_initializer"),
+        input_text=get_tensor("input_text"), input_word=get_tensor("input_word"), input_char=get_tensor("input_char"),
+        output_predict=get_tensor("infer_predict"), output_text_predict=get_tensor("infer_text_predict"),
+        output_sequence_length=get_tensor("infer_sequence_length"))
+
 def get_model_creator(model_type):
     if model_type == "seq_softmax":
         model_creator = SequenceSoftmax
@@ -40,6 +40,8 @@ def create_default_hyperparams(config_type):
             data_label_pad="P",
             data_external_index_enable=False,
             data_pipeline_mode="default",
+            data_bucket_enable=False,
+            data_bucket_boundaries=[16,32,64,128,256],
             data_num_parallel=4,
             data_log_output_dir="",
             data_result_output_dir="",
@@ -53,6 +55,8 @@ def create_default_hyperparams(config_type):
             train_model_transferable=False,
             train_model_version="",
             train_model_output_dir="",
+            train_model_freeze_enable=False,
+            train_model_quantize_enable=False,
             train_ckpt_output_dir="",
             train_summary_output_dir="",
             train_step_per_stat=10,
@@ -102,6 +106,7 @@ def create_default_hyperparams(config_type):
             model_char_pooling_type="max",
             model_char_feat_trainable=True,
             model_char_feat_enable=True,
+            model_char_feat_cache_enable=False,
             model_ext_embed_dim=20,
             model_ext_feat_enable=False,
             model_ext_feat_mode="direct",
@@ -111,6 +116,8 @@ def create_default_hyperparams(config_type):
             model_fusion_hidden_activation="relu",
             model_fusion_dropout=0.0,
             model_fusion_trainable=False,
+            model_fusion_cache_enable=False,
+            model_cache_chunk_size=1000,
             model_sequence_num_layer=1,
             model_sequence_unit_dim=100,
             model_sequence_cell_type="lstm",
@@ -123,12 +130,14 @@ def create_default_hyperparams(config_type):
             model_labeling_dropout=0.5,
             model_labeling_trainable=True,
             model_labeling_transferable=True,
+            model_labeling_decode_type="default",
             device_num_gpus=1,
             device_default_gpu_id=0,
             device_log_device_placement=False,
             device_allow_soft_placement=False,
             device_allow_growth=False,
-            device_per_process_gpu_memory_fraction=0.8
+            device_per_process_gpu_memory_fraction=0.8,
+            device_xla_jit_enable=False
         )
     elif config_type == "att_crf":
         hyperparams = tf.contrib.training.HParams(
@@ -158,6 +167,8 @@ def create_default_hyperparams(config_type):
             data_label_pad="P",
             data_external_index_enable=False,
             data_pipeline_mode="default",
+            data_bucket_enable=False,
+            data_bucket_boundaries=[16,32,64,128,256],
             data_num_parallel=4,
             data_log_output_dir="",
             data_result_output_dir="",
@@ -220,6 +231,7 @@ def create_default_hyperparams(config_type):
             model_char_pooling_type="max",
             model_char_feat_trainable=True,
             model_char_feat_enable=True,
+            model_char_feat_cache_enable=False,
             model_ext_embed_dim=20,
             model_ext_feat_enable=False,
             model_ext_feat_mode="direct",
@@ -229,6 +241,7 @@ def create_default_hyperparams(config_type):
             model_fusion_hidden_activation="relu",
             model_fusion_dropout=0.0,
             model_fusion_trainable=False,
+            model_fusion_cache_enable=False,
             model_attention_num_layer=4,
             model_attention_num_head=8,
             model_attention_unit_dim=400,
@@ -246,7 +259,8 @@ def create_default_hyperparams(config_type):
             device_log_device_placement=False,
             device_allow_soft_placement=False,
             device_allow_growth=False,
-            device_per_process_gpu_memory_fraction=0.8
+            device_per_process_gpu_memory_fraction=0.8,
+            device_xla_jit_enable=False
         )
     elif config_type == "seq_softmax":
         hyperparams = tf.contrib.training.HParams(
@@ -276,6 +290,8 @@ def create_default_hyperparams(config_type):
             data_label_pad="P",
             data_external_index_enable=False,
             data_pipeline_mode="default",
+            data_bucket_enable=False,
+            data_bucket_boundaries=[16,32,64,128,256],
             data_num_parallel=4,
             data_log_output_dir="",
             data_result_output_dir="",
@@ -339,6 +355,7 @@ def create_default_hyperparams(config_type):
             model_char_pooling_type="max",
             model_char_feat_trainable=True,
             model_char_feat_enable=True,
+            model_char_feat_cache_enable=False,
             model_ext_embed_dim=20,
             model_ext_feat_enable=False,
             model_ext_feat_mode="direct",
@@ -348,6 +365,7 @@ def create_default_hyperparams(config_type):
             model_fusion_hidden_activation="relu",
             model_fusion_dropout=0.0,
             model_fusion_trainable=False,
+            model_fusion_cache_enable=False,
             model_sequence_num_layer=1,
             model_sequence_unit_dim=100,
             model_sequence_cell_type="lstm",
@@ -365,7 +383,8 @@ def create_default_hyperparams(config_type):
             device_log_device_placement=False,
             device_allow_soft_placement=False,
             device_allow_growth=False,
-            device_per_process_gpu_memory_fraction=0.8
+            device_per_process_gpu_memory_fraction=0.8,
+            device_xla_jit_enable=False
         )
     else:
         raise ValueError("unsupported config type {0}".format(config_type))
@@ -380,6 +399,12 @@ def load_hyperparams(config_file):
             hyperparams = create_default_hyperparams(hyperparams_dict["model_type"])
             hyperparams.override_from_dict(hyperparams_dict)
             
+            """quantized graph is transformed from frozen graph, so it can't be exported without freezing"""
+            hyperparams_values = hyperparams.values()
+            if (hyperparams_values.get("train_model_quantize_enable", False) == True and
+                hyperparams_values.get("train_model_freeze_enable", False) == False):
+                raise ValueError("train_model_quantize_enable requires train_model_freeze_enable")
+            
             return hyperparams
     else:
         raise FileNotFoundError("config file not found")